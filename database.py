@@ -5,7 +5,9 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from redis.asyncio import Redis
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -22,11 +24,78 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # Pools are per process: every Uvicorn worker opens its own, so the
+    # server sees workers * pool size connections
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=int(os.getenv("MONGO_MAX_POOL", 50)),
+        minPoolSize=int(os.getenv("MONGO_MIN_POOL", 0)),
+        compressors="zstd",
+        retryWrites=True,
+        serverSelectionTimeoutMS=2000,
+    )
     db = _client[database_name]
 
+# Optional read-through cache; endpoints fall back to MongoDB when unset
+cache = None
+
+redis_url = os.getenv("REDIS_URL")
+
+if redis_url:
+    # a hung cache must degrade to a miss quickly rather than block requests
+    cache = Redis.from_url(redis_url, socket_connect_timeout=0.3, socket_timeout=0.3)
+
+
+class BatchLoader:
+    """Coalesce by-_id lookups issued in the same event-loop tick into one $in query"""
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+        self._pending = {}
+        # strong refs to in-flight dispatches; the loop only keeps weak ones
+        self._tasks = set()
+
+    async def load(self, _id):
+        """Return the document with `_id` (a private copy), or None if missing"""
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._schedule)
+        future = loop.create_future()
+        self._pending.setdefault(_id, []).append(future)
+        return await future
+
+    def _schedule(self):
+        task = asyncio.ensure_future(self._dispatch())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self):
+        batch, self._pending = self._pending, {}
+        try:
+            docs = await db[self.collection_name].find({"_id": {"$in": list(batch)}}).to_list(length=None)
+        except BaseException as e:
+            # never leave waiters hanging, including on cancellation at shutdown
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        if isinstance(e, Exception):
+                            future.set_exception(e)
+                        else:
+                            future.cancel()
+            if not isinstance(e, Exception):
+                raise
+            return
+        by_id = {doc["_id"]: doc for doc in docs}
+        for _id, futures in batch.items():
+            doc = by_id.get(_id)
+            for future in futures:
+                if not future.done():
+                    # callers may mutate the result (e.g. serialize), so hand out copies
+                    future.set_result(dict(doc) if doc else None)
+
+
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,10 +109,10 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -52,4 +121,4 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=limit)
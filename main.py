@@ -1,15 +1,36 @@
+import hashlib
+import logging
 import os
 from datetime import datetime, timezone
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, OperationFailure, PyMongoError
+from redis.exceptions import RedisError
+import orjson
 
-from database import db, create_document, get_documents
+from database import db, cache, BatchLoader, create_document, get_documents
 
-app = FastAPI(title="Collaborative Project Management API")
+logger = logging.getLogger(__name__)
+
+
+def _json_default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError
+
+
+class APIResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+app = FastAPI(title="Collaborative Project Management API", default_response_class=APIResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,8 +40,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Concurrent get-by-id requests share a single $in query per loop tick
+user_loader = BatchLoader("user")
+project_loader = BatchLoader("project")
+
+
+# --------- Startup ---------
+INDEXES = (
+    ("user", "email", {"unique": True}),
+    ("project", [("updated_at", -1), ("_id", -1)], {}),
+    ("project", [("category_lc", 1), ("updated_at", -1), ("_id", -1)], {}),
+    ("project", [("title", "text"), ("description", "text"), ("tags", "text")], {}),
+    ("project", "tags", {}),
+    ("project", "createdBy", {}),
+    ("chatmessage", [("projectId", 1), ("timestamp", -1), ("_id", -1)], {}),
+    ("collaborationrequest", [("projectId", 1), ("senderUserId", 1), ("status", 1)], {}),
+    ("collaborationrequest", [("projectId", 1), ("createdAt", -1), ("_id", -1)], {}),
+)
+
+
+@app.on_event("startup")
+async def ensure_indexes():
+    # Never abort boot here: /test must stay up to report database problems
+    if db is None:
+        return
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except ConnectionFailure as e:
+            logger.warning("Database unreachable, skipping index setup: %s", e)
+            return
+        except PyMongoError as e:
+            # e.g. duplicate emails left by older logins block the unique index
+            logger.warning("Could not create index %s on %s: %s", keys, collection, e)
+
+
 # --------- Utilities ---------
 
+def stored_now() -> datetime:
+    """Current time as MongoDB will hand it back: naive UTC, millisecond precision"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
 def oid(id_str: str) -> ObjectId:
     try:
         return ObjectId(id_str)
@@ -28,11 +90,112 @@ def oid(id_str: str) -> ObjectId:
         raise HTTPException(status_code=400, detail="Invalid id format")
 
 
+PROJECT_CARD_FIELDS = ("title", "category", "tags", "createdBy", "updated_at")
+USER_CARD_FIELDS = ("username", "email", "emailVerified", "companyName", "role", "interests")
+# fields a client may add to a card via `?fields=`
+PROJECT_FIELDS = PROJECT_CARD_FIELDS + ("description", "attachments", "members", "type", "created_at")
+USER_FIELDS = USER_CARD_FIELDS + ("profilePic", "linkedIn", "created_at", "updated_at")
+
+
+def card_projection(base: tuple, allowed: tuple, fields: Optional[str] = None) -> dict:
+    """Inclusion projection for `base`, extended by a comma-separated `fields` list from `allowed`"""
+    proj = {f: 1 for f in base}
+    if fields:
+        extra = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in extra if f not in allowed]
+        if unknown:
+            raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+        proj.update({f: 1 for f in extra})
+    return proj
+
+
+PROJECT_TTL = 60
+PROJECT_LIST_TTL = 30
+RECOMMENDATIONS_TTL = 60
+
+
+async def cache_get(key: str):
+    """Return the cached JSON value for `key`, or None on miss/unavailable cache"""
+    if cache is None:
+        return None
+    try:
+        raw = await cache.get(key)
+    except RedisError:
+        return None
+    return orjson.loads(raw) if raw else None
+
+
+async def cache_set(key: str, value, ttl: int) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.setex(key, ttl, orjson.dumps(value, default=_json_default))
+    except RedisError:
+        pass
+
+
+# Listing and recommendation keys embed this counter; bumping it orphans
+# every such key at once and the stale ones age out via their TTL.
+PROJECTS_GEN_KEY = "projects:gen"
+
+
+async def projects_generation() -> int:
+    if cache is None:
+        return 0
+    try:
+        raw = await cache.get(PROJECTS_GEN_KEY)
+    except RedisError:
+        return 0
+    return int(raw or 0)
+
+
+def project_key(pid: ObjectId) -> str:
+    # keyed on the parsed id: oid() accepts any hex casing of the same id
+    return f"project:{pid}"
+
+
+async def invalidate_projects(pid: Optional[ObjectId] = None) -> None:
+    """Drop the cached project (if given) and retire all cached listings and recommendations"""
+    if cache is None:
+        return
+    try:
+        await cache.incr(PROJECTS_GEN_KEY)
+        if pid is not None:
+            await cache.delete(project_key(pid))
+    except RedisError:
+        pass
+
+
+def keyset_match(field: str, cursor: Optional[datetime], cursor_id: Optional[str]) -> dict:
+    """Filter for the page after (`cursor`, `cursor_id`) in a (field desc, _id desc) sort"""
+    if cursor is None and cursor_id is None:
+        return {}
+    if cursor is None or cursor_id is None:
+        raise HTTPException(400, "cursor and cursor_id must be given together")
+    # _id breaks ties between items sharing a timestamp
+    return {"$or": [{field: {"$lt": cursor}}, {field: cursor, "_id": {"$lt": oid(cursor_id)}}]}
+
+
+def card_stage(base: tuple, allowed: tuple, fields: Optional[str] = None) -> dict:
+    """$project stage emitting card fields with `id` as a string in place of `_id`"""
+    return {"$project": {**card_projection(base, allowed, fields), "_id": 0, "id": {"$toString": "$_id"}}}
+
+
+# Full-document equivalent of `serialize` for aggregation pipelines
+ID_STAGES = [{"$addFields": {"id": {"$toString": "$_id"}}}, {"$project": {"_id": 0}}]
+
+
 def serialize(doc: dict) -> dict:
     if not doc:
         return doc
     doc["id"] = str(doc.get("_id"))
     doc.pop("_id", None)
+    # reference ids are stored as ObjectId; the API exposes them as strings
+    for key in ("createdBy", "projectId", "senderId", "senderUserId"):
+        if isinstance(doc.get(key), ObjectId):
+            doc[key] = str(doc[key])
+    if "members" in doc:
+        doc["members"] = [str(uid) for uid in doc["members"]]
     return doc
 
 
@@ -71,12 +234,12 @@ class RequestIn(BaseModel):
 
 # --------- Root & Test ---------
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Collaborative Project Management Backend Running"}
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -92,7 +255,7 @@ def test_database():
             response["database_name"] = db.name
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await db.list_collection_names()
                 response["collections"] = collections
                 response["database"] = "✅ Connected & Working"
             except Exception as e:
@@ -106,7 +269,7 @@ def test_database():
 
 # --------- Schema Introspection (optional helper) ---------
 @app.get("/schema")
-def get_schema_overview():
+async def get_schema_overview():
     return {
         "collections": [
             "user",
@@ -119,19 +282,18 @@ def get_schema_overview():
 
 # --------- Users ---------
 @app.get("/api/users")
-def list_users():
-    users = db["user"].find().limit(100)
-    return [serialize(u) for u in users]
+async def list_users(fields: Optional[str] = None):
+    cursor = db["user"].aggregate([{"$limit": 100}, card_stage(USER_CARD_FIELDS, USER_FIELDS, fields)], batchSize=100)
+    return APIResponse(await cursor.to_list(length=100))
 
 
 @app.post("/api/users")
-def create_or_login_user(user: UserIn):
-    existing = db["user"].find_one({"email": user.email})
+async def create_or_login_user(user: UserIn):
     now = datetime.now(timezone.utc)
-    if existing:
-        # update profile fields on login
-        db["user"].update_one(
-            {"_id": existing["_id"]},
+    # update profile fields on login, create the user on first sign-in
+    try:
+        u = await db["user"].find_one_and_update(
+            {"email": user.email},
             {
                 "$set": {
                     "username": user.username,
@@ -141,177 +303,260 @@ def create_or_login_user(user: UserIn):
                     "linkedIn": user.linkedIn,
                     "interests": user.interests,
                     "updated_at": now,
-                }
+                },
+                "$setOnInsert": {
+                    "emailVerified": user.emailVerified,
+                    "created_at": now,
+                },
             },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
         )
-        updated = db["user"].find_one({"_id": existing["_id"]})
-        return serialize(updated)
-    else:
-        data = user.model_dump()
-        data["created_at"] = now
-        data["updated_at"] = now
-        new_id = db["user"].insert_one(data).inserted_id
-        return serialize(db["user"].find_one({"_id": new_id}))
+    except DuplicateKeyError:
+        # a concurrent first sign-in with the same email won the upsert
+        raise HTTPException(409, "Email already registered")
+    return serialize(u)
 
 
 @app.get("/api/users/{user_id}")
-def get_user(user_id: str):
-    u = db["user"].find_one({"_id": oid(user_id)})
+async def get_user(user_id: str):
+    u = await user_loader.load(oid(user_id))
     if not u:
         raise HTTPException(404, "User not found")
     return serialize(u)
 
 
 @app.put("/api/users/{user_id}")
-def update_user(user_id: str, user: UserIn):
+async def update_user(user_id: str, user: UserIn):
     now = datetime.now(timezone.utc)
-    res = db["user"].update_one({"_id": oid(user_id)}, {"$set": {**user.model_dump(), "updated_at": now}})
-    if res.matched_count == 0:
+    data = user.model_dump(exclude_unset=True)
+    data["updated_at"] = now
+    try:
+        u = await db["user"].find_one_and_update(
+            {"_id": oid(user_id)},
+            {"$set": data},
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        raise HTTPException(409, "Email already registered")
+    if not u:
         raise HTTPException(404, "User not found")
-    return serialize(db["user"].find_one({"_id": oid(user_id)}))
+    return serialize(u)
 
 
 @app.post("/api/users/{user_id}/verify_email")
-def verify_email(user_id: str):
-    db["user"].update_one({"_id": oid(user_id)}, {"$set": {"emailVerified": True}})
+async def verify_email(user_id: str):
+    await db["user"].update_one({"_id": oid(user_id)}, {"$set": {"emailVerified": True}})
     return {"status": "verified"}
 
 
 # --------- Projects ---------
 @app.get("/api/projects")
-def list_projects(q: Optional[str] = None, category: Optional[str] = None, interest: Optional[str] = None, creator: Optional[str] = None):
+async def list_projects(q: Optional[str] = None, category: Optional[str] = None, interest: Optional[str] = None, creator: Optional[str] = None, fields: Optional[str] = None, limit: int = Query(50, ge=1, le=200), cursor: Optional[datetime] = None, cursor_id: Optional[str] = None):
     query = {}
     if q:
-        query["$or"] = [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"description": {"$regex": q, "$options": "i"}},
-            {"tags": {"$regex": q, "$options": "i"}},
-        ]
+        query["$text"] = {"$search": q}
     if category:
-        query["category"] = {"$regex": f"^{category}$", "$options": "i"}
+        query["category_lc"] = category.lower()
     if interest:
-        query["tags"] = {"$regex": interest, "$options": "i"}
+        query["tags"] = {"$in": [interest]}
     if creator:
-        query["createdBy"] = creator
-    items = db["project"].find(query).sort("updated_at", -1)
-    return [serialize(i) for i in items]
+        query["createdBy"] = oid(creator)
+    # keyset pagination: pass the last item's updated_at and id as `cursor`/`cursor_id` for the next page
+    query.update(keyset_match("updated_at", cursor, cursor_id))
+    key = f"projects:{await projects_generation()}:" + hashlib.blake2b(orjson.dumps([q, category, interest, creator, fields, limit, cursor, cursor_id]), digest_size=8).hexdigest()
+    cached = await cache_get(key)
+    if cached is not None:
+        return APIResponse(cached)
+    agg = db["project"].aggregate([
+        {"$match": query},
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$limit": limit},
+        card_stage(PROJECT_CARD_FIELDS, PROJECT_FIELDS, fields),
+    ], batchSize=limit)
+    result = await agg.to_list(length=limit)
+    await cache_set(key, result, PROJECT_LIST_TTL)
+    return APIResponse(result)
 
 
 @app.post("/api/projects")
-def create_project(p: ProjectIn):
-    now = datetime.now(timezone.utc)
+async def create_project(p: ProjectIn):
+    # returned as-is, so match what a re-read would give
+    now = stored_now()
     data = p.model_dump()
+    data["createdBy"] = oid(p.createdBy)
+    data["members"] = [oid(uid) for uid in p.members]
+    data["category_lc"] = p.category.lower()
     data["created_at"] = now
     data["updated_at"] = now
     # Ensure owner is member too
-    if p.createdBy and p.createdBy not in data.get("members", []):
-        data.setdefault("members", []).append(p.createdBy)
-    new_id = db["project"].insert_one(data).inserted_id
-    return serialize(db["project"].find_one({"_id": new_id}))
+    if data["createdBy"] not in data["members"]:
+        data["members"].append(data["createdBy"])
+    res = await db["project"].insert_one(data)
+    data["_id"] = res.inserted_id
+    await invalidate_projects()
+    return serialize(data)
 
 
 @app.get("/api/projects/{project_id}")
-def get_project(project_id: str):
-    pr = db["project"].find_one({"_id": oid(project_id)})
+async def get_project(project_id: str):
+    pid = oid(project_id)
+    key = project_key(pid)
+    cached = await cache_get(key)
+    if cached is not None:
+        return cached
+    pr = await project_loader.load(pid)
     if not pr:
         raise HTTPException(404, "Project not found")
-    return serialize(pr)
+    result = serialize(pr)
+    await cache_set(key, result, PROJECT_TTL)
+    return result
 
 
 @app.put("/api/projects/{project_id}")
-def update_project(project_id: str, p: ProjectIn):
+async def update_project(project_id: str, p: ProjectIn):
     now = datetime.now(timezone.utc)
-    res = db["project"].update_one({"_id": oid(project_id)}, {"$set": {**p.model_dump(), "updated_at": now}})
-    if res.matched_count == 0:
+    data = p.model_dump(exclude_unset=True)
+    if "createdBy" in data:
+        data["createdBy"] = oid(data["createdBy"])
+    if "members" in data:
+        data["members"] = [oid(uid) for uid in data["members"]]
+    data["category_lc"] = p.category.lower()
+    data["updated_at"] = now
+    pr = await db["project"].find_one_and_update(
+        {"_id": oid(project_id)},
+        {"$set": data},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not pr:
         raise HTTPException(404, "Project not found")
-    return serialize(db["project"].find_one({"_id": oid(project_id)}))
+    await invalidate_projects(pr["_id"])
+    return serialize(pr)
 
 
 @app.delete("/api/projects/{project_id}")
-def delete_project(project_id: str, userId: Optional[str] = None):
-    pr = db["project"].find_one({"_id": oid(project_id)})
+async def delete_project(project_id: str, userId: Optional[str] = None):
+    pr = await db["project"].find_one({"_id": oid(project_id)})
     if not pr:
         raise HTTPException(404, "Project not found")
-    if userId and pr.get("createdBy") != userId:
+    if userId and pr.get("createdBy") != oid(userId):
         raise HTTPException(403, "Only owner can delete")
-    db["project"].delete_one({"_id": pr["_id"]})
+    await db["project"].delete_one({"_id": pr["_id"]})
     # cleanup related
-    db["chatmessage"].delete_many({"projectId": project_id})
-    db["collaborationrequest"].delete_many({"projectId": project_id})
+    await db["chatmessage"].delete_many({"projectId": pr["_id"]})
+    await db["collaborationrequest"].delete_many({"projectId": pr["_id"]})
+    await invalidate_projects(pr["_id"])
     return {"deleted": True}
 
 
 @app.post("/api/projects/{project_id}/join")
-def join_project(project_id: str, userId: str):
-    pr = db["project"].find_one({"_id": oid(project_id)})
-    if not pr:
+async def join_project(project_id: str, userId: str):
+    pid = oid(project_id)
+    pr = await db["project"].find_one_and_update(
+        {"_id": pid, "members": {"$ne": oid(userId)}},
+        {"$addToSet": {"members": oid(userId)}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 1},
+    )
+    # No match means either already a member or no such project
+    if not pr and not await db["project"].count_documents({"_id": pid}, limit=1):
         raise HTTPException(404, "Project not found")
-    if userId in pr.get("members", []):
-        return {"joined": True}
-    db["project"].update_one({"_id": pr["_id"]}, {"$addToSet": {"members": userId}, "$set": {"updated_at": datetime.now(timezone.utc)}})
+    if pr:
+        await invalidate_projects(pid)
     return {"joined": True}
 
 
 @app.post("/api/projects/{project_id}/leave")
-def leave_project(project_id: str, userId: str):
-    pr = db["project"].find_one({"_id": oid(project_id)})
-    if not pr:
+async def leave_project(project_id: str, userId: str):
+    pid = oid(project_id)
+    res = await db["project"].update_one({"_id": pid}, {"$pull": {"members": oid(userId)}, "$set": {"updated_at": datetime.now(timezone.utc)}})
+    if res.matched_count == 0:
         raise HTTPException(404, "Project not found")
-    db["project"].update_one({"_id": pr["_id"]}, {"$pull": {"members": userId}, "$set": {"updated_at": datetime.now(timezone.utc)}})
+    await invalidate_projects(pid)
     return {"left": True}
 
 
 @app.get("/api/projects/{project_id}/members")
-def list_members(project_id: str):
-    pr = db["project"].find_one({"_id": oid(project_id)})
-    if not pr:
+async def list_members(project_id: str, fields: Optional[str] = None, limit: int = Query(50, ge=1, le=200), cursor: Optional[str] = None):
+    # keyset pagination: pass the last member's id as `cursor` for the next page
+    page = [{"$match": {"_id": {"$gt": oid(cursor)}}}] if cursor else []
+    agg = db["project"].aggregate([
+        {"$match": {"_id": oid(project_id)}},
+        # localField/foreignField combined with a pipeline needs MongoDB 5.0+
+        {"$lookup": {
+            "from": "user",
+            "localField": "members",
+            "foreignField": "_id",
+            "pipeline": [*page, {"$sort": {"_id": 1}}, {"$limit": limit}, card_stage(USER_CARD_FIELDS, USER_FIELDS, fields)],
+            "as": "users",
+        }},
+        {"$project": {"users": 1}},
+    ])
+    found = await agg.to_list(length=1)
+    if not found:
         raise HTTPException(404, "Project not found")
-    members = list(db["user"].find({"_id": {"$in": [oid(uid) for uid in pr.get("members", []) if ObjectId.is_valid(uid)]}}))
-    return [serialize(u) for u in members]
+    return APIResponse(found[0]["users"])
 
 
 # --------- Chat ---------
 @app.get("/api/projects/{project_id}/chat")
-def get_chat(project_id: str, limit: int = 50):
-    msgs = db["chatmessage"].find({"projectId": project_id}).sort("timestamp", -1).limit(limit)
-    items = [serialize(m) for m in msgs]
-    return list(reversed(items))
+async def get_chat(project_id: str, limit: int = Query(50, ge=1, le=200)):
+    # newest `limit` messages, returned oldest-first
+    cursor = db["chatmessage"].aggregate([
+        {"$match": {"projectId": oid(project_id)}},
+        # _id breaks timestamp ties (the sim-bot reply shares its question's millisecond)
+        {"$sort": {"timestamp": -1, "_id": -1}},
+        {"$limit": limit},
+        {"$sort": {"timestamp": 1, "_id": 1}},
+        *ID_STAGES,
+    ], batchSize=limit)
+    return APIResponse(await cursor.to_list(length=limit))
 
 
 @app.post("/api/projects/{project_id}/chat")
-def post_chat(project_id: str, msg: ChatIn):
-    now = datetime.now(timezone.utc)
-    data = {"projectId": project_id, "senderId": msg.senderId, "content": msg.content, "timestamp": now}
-    new_id = db["chatmessage"].insert_one(data).inserted_id
-    inserted = db["chatmessage"].find_one({"_id": new_id})
+async def post_chat(project_id: str, msg: ChatIn):
+    # returned as-is, so match what a re-read would give
+    now = stored_now()
+    pid = oid(project_id)
+    data = {"projectId": pid, "senderId": oid(msg.senderId), "content": msg.content, "timestamp": now}
+    res = await db["chatmessage"].insert_one(data)
+    data["_id"] = res.inserted_id
     # Simulated bot co-creator reply for activity
     if msg.content and msg.content.strip().endswith("?"):
         bot = {
-            "projectId": project_id,
+            "projectId": pid,
             "senderId": "sim-bot",
             "content": "Great question! Let's capture tasks for this and assign owners.",
             "timestamp": datetime.now(timezone.utc),
         }
-        db["chatmessage"].insert_one(bot)
-    return serialize(inserted)
+        await db["chatmessage"].insert_one(bot)
+    return serialize(data)
 
 
 # --------- Collaboration Requests ---------
 @app.post("/api/projects/{project_id}/requests")
-def request_collab(project_id: str, r: RequestIn):
+async def request_collab(project_id: str, r: RequestIn):
     # Ensure single pending per user/project
-    existing = db["collaborationrequest"].find_one({"projectId": project_id, "senderUserId": r.senderUserId, "status": "pending"})
-    if existing:
-        return serialize(existing)
-    data = {"projectId": project_id, "senderUserId": r.senderUserId, "status": "pending", "createdAt": datetime.now(timezone.utc)}
-    new_id = db["collaborationrequest"].insert_one(data).inserted_id
-    return serialize(db["collaborationrequest"].find_one({"_id": new_id}))
+    req = await db["collaborationrequest"].find_one_and_update(
+        {"projectId": oid(project_id), "senderUserId": oid(r.senderUserId), "status": "pending"},
+        {"$setOnInsert": {"createdAt": datetime.now(timezone.utc)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return serialize(req)
 
 
 @app.get("/api/projects/{project_id}/requests")
-def list_requests(project_id: str):
-    items = db["collaborationrequest"].find({"projectId": project_id}).sort("createdAt", -1)
-    return [serialize(i) for i in items]
+async def list_requests(project_id: str, limit: int = Query(50, ge=1, le=200), cursor: Optional[datetime] = None, cursor_id: Optional[str] = None):
+    query = {"projectId": oid(project_id)}
+    # keyset pagination: pass the last item's createdAt and id as `cursor`/`cursor_id` for the next page
+    query.update(keyset_match("createdAt", cursor, cursor_id))
+    agg = db["collaborationrequest"].aggregate([
+        {"$match": query},
+        {"$sort": {"createdAt": -1, "_id": -1}},
+        {"$limit": limit},
+        *ID_STAGES,
+    ], batchSize=limit)
+    return APIResponse(await agg.to_list(length=limit))
 
 
 class RespondIn(BaseModel):
@@ -319,40 +564,75 @@ class RespondIn(BaseModel):
     ownerId: Optional[str] = None
 
 
+# raised by servers that are not replica set members or mongos when a transaction is started
+ILLEGAL_OPERATION = 20
+
+
 @app.post("/api/requests/{request_id}/respond")
-def respond_request(request_id: str, body: RespondIn):
-    req = db["collaborationrequest"].find_one({"_id": oid(request_id)})
-    if not req:
-        raise HTTPException(404, "Request not found")
+async def respond_request(request_id: str, body: RespondIn):
     decision = body.decision
     if decision not in ("accepted", "rejected"):
         raise HTTPException(400, "Invalid decision")
-    db["collaborationrequest"].update_one({"_id": req["_id"]}, {"$set": {"status": decision}})
-    if decision == "accepted":
-        db["project"].update_one({"_id": oid(req["projectId"])}, {"$addToSet": {"members": req["senderUserId"]}, "$set": {"updated_at": datetime.now(timezone.utc)}})
+    rid = oid(request_id)
+    if decision == "rejected":
+        req = await db["collaborationrequest"].find_one_and_update({"_id": rid}, {"$set": {"status": decision}})
+        if not req:
+            raise HTTPException(404, "Request not found")
+        return {"status": decision}
+
+    async def accept(session=None):
+        req = await db["collaborationrequest"].find_one_and_update({"_id": rid}, {"$set": {"status": decision}}, session=session)
+        if not req:
+            raise HTTPException(404, "Request not found")
+        await db["project"].update_one({"_id": req["projectId"]}, {"$addToSet": {"members": req["senderUserId"]}, "$set": {"updated_at": datetime.now(timezone.utc)}}, session=session)
+        return req
+
+    # accepting must flip the request and add the member together;
+    # with_transaction retries transient errors and unknown commit results
+    try:
+        async with await db.client.start_session() as s:
+            req = await s.with_transaction(accept)
+    except OperationFailure as e:
+        if e.code != ILLEGAL_OPERATION:
+            raise
+        # standalone server without transaction support: plain sequential writes
+        req = await accept()
+    await invalidate_projects(req["projectId"])
     return {"status": decision}
 
 
 # --------- Recommendations ---------
 @app.get("/api/recommendations/{user_id}")
-def recommendations(user_id: str, limit: int = 6):
-    user = db["user"].find_one({"_id": oid(user_id)})
+async def recommendations(user_id: str, limit: int = Query(6, ge=1, le=50), fields: Optional[str] = None):
+    user = await db["user"].find_one({"_id": oid(user_id)}, {"interests": 1})
     if not user:
         raise HTTPException(404, "User not found")
     interests = user.get("interests", [])
-    if not interests:
-        items = db["project"].find().sort("updated_at", -1).limit(limit)
-        return [serialize(i) for i in items]
-    query = {"$or": [{"category": {"$in": interests}}, {"tags": {"$in": interests}}]}
-    items = db["project"].find(query).sort("updated_at", -1).limit(limit)
-    return [serialize(i) for i in items]
+    # users with the same interests share one cached result
+    digest = hashlib.blake2b(orjson.dumps(sorted(interests)), digest_size=8).hexdigest()
+    key = f"rec:{await projects_generation()}:{digest}:{limit}:{fields or ''}"
+    cached = await cache_get(key)
+    if cached is not None:
+        return APIResponse(cached)
+    query = {}
+    if interests:
+        query = {"$or": [{"category_lc": {"$in": [i.lower() for i in interests]}}, {"tags": {"$in": interests}}]}
+    cursor = db["project"].aggregate([
+        {"$match": query},
+        {"$sort": {"updated_at": -1}},
+        {"$limit": limit},
+        card_stage(PROJECT_CARD_FIELDS, PROJECT_FIELDS, fields),
+    ], batchSize=limit)
+    result = await cursor.to_list(length=limit)
+    await cache_set(key, result, RECOMMENDATIONS_TTL)
+    return APIResponse(result)
 
 
 # --------- Seeding data (5+ simulated users and projects) ---------
 @app.post("/api/seed")
-def seed():
-    existing_users = list(db["user"].find())
-    if len(existing_users) < 5:
+async def seed():
+    now = datetime.now(timezone.utc)
+    if await db["user"].estimated_document_count() < 5:
         sample_users = [
             {"username": "Ava", "email": "ava@example.com", "emailVerified": True, "role": "student", "interests": ["Computer Science", "AI", "Design"]},
             {"username": "Ben", "email": "ben@example.com", "emailVerified": True, "role": "working", "interests": ["Business", "Design"]},
@@ -360,34 +640,35 @@ def seed():
             {"username": "Dee", "email": "dee@example.com", "emailVerified": False, "role": "working", "interests": ["Research", "Arts"]},
             {"username": "Eli", "email": "eli@example.com", "emailVerified": True, "role": "working", "interests": ["Computer Science", "Business"]},
         ]
-        ids = []
-        for su in sample_users:
-            exists = db["user"].find_one({"email": su["email"]})
-            if not exists:
-                su["created_at"] = datetime.now(timezone.utc)
-                su["updated_at"] = datetime.now(timezone.utc)
-                uid = db["user"].insert_one(su).inserted_id
-                ids.append(str(uid))
-            else:
-                ids.append(str(exists["_id"]))
-    users = list(db["user"].find())
-    if db["project"].count_documents({}) < 5 and users:
+        ops = [
+            UpdateOne({"email": su["email"]}, {"$setOnInsert": {**su, "created_at": now, "updated_at": now}}, upsert=True)
+            for su in sample_users
+        ]
+        await db["user"].bulk_write(ops, ordered=False)
+    if await db["project"].estimated_document_count() < 5:
+        users = await db["user"].find({}, {"_id": 1}).limit(5).to_list(length=5)
         samples = [
-            {"title": "Open Source Task Tracker", "description": "Collaborative task tracker web app.", "category": "Computer Science", "tags": ["React", "MongoDB"], "attachments": [], "createdBy": str(users[0]["_id"]), "members": [str(users[0]["_id"])], "type": "combined"},
-            {"title": "Design System Kit", "description": "Create a Notion-like neutral design kit.", "category": "Design", "tags": ["UI", "Figma"], "attachments": [], "createdBy": str(users[1]["_id"]), "members": [str(users[1]["_id"])], "type": "combined"},
-            {"title": "Physics Lab Simulations", "description": "Interactive physics experiments.", "category": "Physics", "tags": ["Education"], "attachments": [], "createdBy": str(users[2]["_id"]), "members": [str(users[2]["_id"])], "type": "solo"},
-            {"title": "Startup Market Research", "description": "Analyze trends and competitors.", "category": "Business", "tags": ["Research"], "attachments": [], "createdBy": str(users[3]["_id"]), "members": [str(users[3]["_id"])], "type": "combined"},
-            {"title": "Art & Tech Showcase", "description": "Blend art with interactive tech.", "category": "Arts", "tags": ["Installation"], "attachments": [], "createdBy": str(users[4]["_id"]), "members": [str(users[4]["_id"])], "type": "combined"},
+            {"title": "Open Source Task Tracker", "description": "Collaborative task tracker web app.", "category": "Computer Science", "tags": ["React", "MongoDB"], "attachments": [], "createdBy": users[0]["_id"], "members": [users[0]["_id"]], "type": "combined"},
+            {"title": "Design System Kit", "description": "Create a Notion-like neutral design kit.", "category": "Design", "tags": ["UI", "Figma"], "attachments": [], "createdBy": users[1]["_id"], "members": [users[1]["_id"]], "type": "combined"},
+            {"title": "Physics Lab Simulations", "description": "Interactive physics experiments.", "category": "Physics", "tags": ["Education"], "attachments": [], "createdBy": users[2]["_id"], "members": [users[2]["_id"]], "type": "solo"},
+            {"title": "Startup Market Research", "description": "Analyze trends and competitors.", "category": "Business", "tags": ["Research"], "attachments": [], "createdBy": users[3]["_id"], "members": [users[3]["_id"]], "type": "combined"},
+            {"title": "Art & Tech Showcase", "description": "Blend art with interactive tech.", "category": "Arts", "tags": ["Installation"], "attachments": [], "createdBy": users[4]["_id"], "members": [users[4]["_id"]], "type": "combined"},
         ]
-        for sp in samples:
-            now = datetime.now(timezone.utc)
-            sp["created_at"] = now
-            sp["updated_at"] = now
-            db["project"].insert_one(sp)
-    return {"seeded": True, "users": len(list(db["user"].find())), "projects": db["project"].count_documents({})}
-
+        ops = [
+            UpdateOne(
+                {"title": sp["title"]},
+                {"$setOnInsert": {**sp, "category_lc": sp["category"].lower(), "created_at": now, "updated_at": now}},
+                upsert=True,
+            )
+            for sp in samples
+        ]
+        await db["project"].bulk_write(ops, ordered=False)
+        await invalidate_projects()
+    return {"seeded": True, "users": await db["user"].estimated_document_count(), "projects": await db["project"].estimated_document_count()}
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    # workers > 1 requires the app as an import string
+    uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers, loop="uvloop", http="httptools")
@@ -0,0 +1,49 @@
+"""
+One-off Data Migration
+
+Brings documents written by older versions of the API up to the current
+storage format. Safe to re-run, but meant to be run once per database:
+
+    python migrate.py
+"""
+
+import asyncio
+
+from database import db
+
+# reference ids used to be stored as hex strings
+REFERENCE_FIELDS = (
+    ("project", "createdBy"),
+    ("chatmessage", "projectId"),
+    ("chatmessage", "senderId"),
+    ("collaborationrequest", "projectId"),
+    ("collaborationrequest", "senderUserId"),
+)
+
+
+def to_object_id(expr: str) -> dict:
+    """$convert to ObjectId, keeping values that are not valid ids (e.g. 'sim-bot')"""
+    return {"$convert": {"input": expr, "to": "objectId", "onError": expr}}
+
+
+async def migrate():
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    # normalized category for projects written before it existed
+    res = await db["project"].update_many({"category_lc": {"$exists": False}}, [{"$set": {"category_lc": {"$toLower": "$category"}}}])
+    print(f"project.category_lc: {res.modified_count} updated")
+
+    res = await db["project"].update_many(
+        {"members": {"$type": "string"}},
+        [{"$set": {"members": {"$map": {"input": "$members", "in": to_object_id("$$this")}}}}],
+    )
+    print(f"project.members: {res.modified_count} updated")
+
+    for collection, field in REFERENCE_FIELDS:
+        res = await db[collection].update_many({field: {"$type": "string"}}, [{"$set": {field: to_object_id(f"${field}")}}])
+        print(f"{collection}.{field}: {res.modified_count} updated")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -29,22 +29,22 @@ class Project(BaseModel):
     category: str
     tags: List[str] = []
     attachments: List[str] = []  # urls for images/docs
-    createdBy: str  # user id string
-    members: List[str] = []  # user id strings
+    createdBy: str  # user id; stored as ObjectId
+    members: List[str] = []  # user ids; stored as ObjectId
     type: Literal['solo','combined'] = 'solo'
     createdAt: Optional[datetime] = None
     updatedAt: Optional[datetime] = None
 
 class ChatMessage(BaseModel):
     messageId: Optional[str] = None
-    projectId: str
-    senderId: str
+    projectId: str  # stored as ObjectId
+    senderId: str  # user id stored as ObjectId, or 'sim-bot'
     content: str
     timestamp: Optional[datetime] = None
 
 class CollaborationRequest(BaseModel):
     requestId: Optional[str] = None
-    projectId: str
-    senderUserId: str
+    projectId: str  # stored as ObjectId
+    senderUserId: str  # stored as ObjectId
     status: Literal['pending','accepted','rejected'] = 'pending'
     createdAt: Optional[datetime] = None